@@ -0,0 +1,3 @@
+__all__ = [
+    "load_config"
+]
\ No newline at end of file
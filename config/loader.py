@@ -0,0 +1,43 @@
+from functools import lru_cache
+from pathlib import Path
+import logging
+import yaml
+
+# libyaml's C loader when PyYAML was built with it, pure Python otherwise
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
+
+logger = logging.getLogger(__name__)
+
+# resolved once at import; load_config() itself is cached below
+BASE_DIR = Path(__file__).resolve().parents[1]
+CONFIG_PATH = BASE_DIR / "config" / "model.yaml"
+
+
+@lru_cache(maxsize=1)
+def load_config():
+    """
+    Parse config/model.yaml once per process and return it as a dict.
+
+    Every module that needs model settings goes through this function,
+    so the YAML file is read and parsed exactly once. Callers must treat
+    the returned dict as read-only.
+
+    Returns:
+        dict: The parsed configuration.
+
+    Raises:
+        FileNotFoundError: If the config YAML cannot be found.
+    """
+    try:
+        with open(CONFIG_PATH, "r") as file:
+            config = yaml.load(file, Loader=_Loader) or {}
+    except FileNotFoundError:
+        raise FileNotFoundError(
+            f"Configuration file not found at {CONFIG_PATH}"
+        ) from None
+
+    logger.info("Loaded configuration from %s.", CONFIG_PATH)
+    return config
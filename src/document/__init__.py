@@ -1,4 +1,5 @@
 __all__ = [
     "document_loader",
-    "text_splitter"
+    "text_splitter",
+    "ChunkSet"
 ]
\ No newline at end of file
@@ -1,9 +1,103 @@
-from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+import multiprocessing
+import threading
 import logging
+import math
+import os
+import fitz  # PyMuPDF
 
 logger = logging.getLogger(__name__)
 
+# Page-extraction parallelism
+_MAX_WORKERS = 8
+_PARALLEL_MIN_PAGES = 32  # below this, process start-up costs more than it saves
+
+# One pool for the whole process, started on first large PDF
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _extract_page_range(path, start, stop):
+    """
+    Extract text for pages [start, stop) of a PDF.
+
+    Runs inside a worker process, so it opens its own document handle —
+    PyMuPDF objects cannot be shared across processes.
+
+    Returns:
+        list[tuple[int, str]]: (page_index, text) pairs in page order.
+    """
+    with fitz.open(path) as pdf:
+        return [(i, pdf[i].get_text("text")) for i in range(start, stop)]
+
+
+def _get_pool(workers):
+    """
+    Return the shared page-extraction pool, creating it on first use.
+
+    Workers are spawned rather than forked: the UI process runs many
+    threads (Gradio workers, torch, tokenizers), and forking while one
+    of them holds a lock — possibly inside PyMuPDF — can deadlock the
+    child.
+    """
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _discard_pool(pool):
+    """Forget a broken pool, unless another thread already replaced it."""
+    global _pool
+
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def _extract_pages(pdf, path):
+    """
+    Extract every page's text, sharding large PDFs across a process pool.
+
+    Small PDFs are read straight from the already-open document, as are
+    large ones when a pool worker has died (e.g. a MuPDF crash or the
+    OOM killer): the broken pool is dropped so the next PDF gets a
+    fresh one instead of failing until restart.
+
+    Returns:
+        list[str]: Page texts in page order.
+    """
+    page_count = pdf.page_count
+    workers = min(os.cpu_count() or 1, _MAX_WORKERS)
+
+    if page_count < _PARALLEL_MIN_PAGES or workers < 2:
+        return [page.get_text("text") for page in pdf]
+
+    step = math.ceil(page_count / workers)
+    ranges = [(start, min(start + step, page_count))
+              for start in range(0, page_count, step)]
+
+    pool = _get_pool(workers)
+    try:
+        futures = [pool.submit(_extract_page_range, path, start, stop)
+                   for start, stop in ranges]
+        # ranges are contiguous and submitted in order, so results concatenate
+        return [text for future in futures for _, text in future.result()]
+    except BrokenProcessPool:
+        logger.warning("Page-extraction pool broke; extracting serially.")
+        _discard_pool(pool)
+
+    return [page.get_text("text") for page in pdf]
+
 
 def document_loader(input_file):
     """
@@ -52,8 +146,12 @@ def document_loader(input_file):
     logger.info("Loading PDF: %s", file_path)
 
     try:
-        loader = PyPDFLoader(str(file_path))
-        loaded_document = loader.load()
+        source = str(file_path)
+        with fitz.open(source) as pdf:
+            loaded_document = [
+                Document(page_content=text, metadata={"page": i, "source": source})
+                for i, text in enumerate(_extract_pages(pdf, source))
+            ]
     except Exception as exc:
         raise RuntimeError(
             f"Failed to parse the PDF file: {exc}"
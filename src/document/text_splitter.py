@@ -1,20 +1,84 @@
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from config.loader import load_config
+from dataclasses import dataclass
+from functools import lru_cache
+import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def text_splitter(data, chunk_size=1000, chunk_overlap=100):
+@dataclass
+class ChunkSet:
+    """
+    Text chunks stored column-wise (structure of arrays).
+
+    Keeps one flat list of texts that can be handed straight to the
+    embedder, with page numbers and sources in parallel arrays instead
+    of one Document + metadata dict per chunk.
+
+    Attributes:
+        texts: Chunk contents, in document order.
+        pages: Zero-based page index of each chunk (int32, -1 if unknown).
+        sources: Source file path of each chunk.
+    """
+    texts: list[str]
+    pages: np.ndarray
+    sources: list[str]
+
+    def __len__(self):
+        return len(self.texts)
+
+    def metadatas(self):
+        """Return per-chunk metadata dicts in the shape vector stores expect."""
+        return [
+            {"page": page, "source": source}
+            for page, source in zip(self.pages.tolist(), self.sources)
+        ]
+
+
+@lru_cache(maxsize=1)
+def _get_tokenizer():
+    """
+    Load the embedding model's own tokenizer once per process.
+
+    Measuring chunks with the same tokenizer the embedder uses keeps each
+    chunk inside the model's token budget, so nothing is silently
+    truncated at embedding time.
+    """
+    model_name = load_config().get("embedding_model", {}).get("model")
+    if not model_name:
+        raise ValueError(
+            "Embedding model name is missing in config/model.yaml "
+            "under 'embedding_model.model'."
+        )
+
+    # transformers is heavy to import; defer it until a document is split
+    from transformers import AutoTokenizer
+
+    logger.info("Loading tokenizer for '%s' ...", model_name)
+    return AutoTokenizer.from_pretrained(model_name)
+
+
+def count_tokens(text):
+    """Return the length of `text` in embedding-model tokens."""
+    return len(_get_tokenizer().encode(text, add_special_tokens=False))
+
+
+def text_splitter(data, chunk_size=256, chunk_overlap=32):
     """
     Split a list of LangChain Documents into smaller text chunks.
 
+    Chunk lengths are measured in tokens of the embedding model's
+    tokenizer rather than raw characters.
+
     Args:
         data: List of Document objects (typically from document_loader).
-        chunk_size: Maximum number of characters per chunk.
-        chunk_overlap: Number of overlapping characters between chunks.
+        chunk_size: Maximum number of tokens per chunk.
+        chunk_overlap: Number of overlapping tokens between chunks.
 
     Returns:
-        list[Document]: Non-empty text chunks ready for embedding.
+        ChunkSet: Non-empty text chunks ready for embedding.
 
     Raises:
         ValueError: If the input data is empty or produces no usable chunks.
@@ -25,16 +89,29 @@ def text_splitter(data, chunk_size=1000, chunk_overlap=100):
             "The PDF may not have contained any extractable text."
         )
 
-    splitter = RecursiveCharacterTextSplitter(
+    splitter = RecursiveCharacterTextSplitter.from_huggingface_tokenizer(
+        _get_tokenizer(),
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
-        length_function=len,
     )
 
-    chunks = splitter.split_documents(data)
+    texts, pages, sources = [], [], []
+    for doc in data:
+        page = doc.metadata.get("page", -1)
+        source = doc.metadata.get("source", "")
+        for text in splitter.split_text(doc.page_content):
+            # Filter out empty / whitespace-only chunks; isspace() stops at
+            # the first visible character instead of copying the string
+            if text and not text.isspace():
+                texts.append(text)
+                pages.append(page)
+                sources.append(source)
 
-    # Filter out empty / whitespace-only chunks
-    chunks = [chunk for chunk in chunks if chunk.page_content.strip()]
+    chunks = ChunkSet(
+        texts=texts,
+        pages=np.asarray(pages, dtype=np.int32),
+        sources=sources,
+    )
 
     if not chunks:
         raise ValueError(
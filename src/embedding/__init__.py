@@ -1 +1 @@
-__all__ = ["get_embedding_model"]
\ No newline at end of file
+__all__ = ["get_embedding_model", "QuantizedEmbeddings", "CachedEmbeddings"]
\ No newline at end of file
@@ -0,0 +1,192 @@
+from langchain_core.embeddings import Embeddings
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
+import threading
+import hashlib
+import logging
+import sqlite3
+import time
+import os
+
+# Shared by every on-disk cache (embeddings here, FAISS indexes in vectordb).
+# Cache keys need speed, not cryptographic strength; BLAKE3 is SIMD-accelerated,
+# stdlib BLAKE2b is the fallback when the blake3 package is not installed
+try:
+    from blake3 import blake3 as content_hasher
+except ImportError:
+    content_hasher = hashlib.blake2b
+
+logger = logging.getLogger(__name__)
+
+# Chunk embeddings persist here between runs
+EMBED_CACHE_PATH = Path(__file__).resolve().parents[2] / ".cache" / "embeddings" / "embed_cache.db"
+
+# Keys per SELECT ... IN (...) — stays under SQLite's host-parameter limit
+_LOOKUP_BATCH = 500
+
+# Rows kept across all namespaces (~4 KB each for bge-large); least
+# recently used vectors are evicted beyond this
+_MAX_ROWS = 100_000
+
+# Uncached chunks handed to the inner model per call
+_EMBED_BATCH = 256
+
+# Batches embedded at once; 1 keeps a single local GPU/CPU model uncontended
+_EMBED_CONCURRENCY = max(1, int(os.environ.get("EMBED_CONCURRENCY", "1")))
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    LangChain Embeddings wrapper that caches document vectors on disk.
+
+    Each chunk text is keyed by its hash, so boilerplate shared across
+    PDFs (headers, footers, disclaimers) and re-uploads of the same
+    document are only embedded once. Vectors live in a small SQLite
+    database, namespaced per model so switching models never mixes
+    vector spaces. Queries are passed straight through, uncached.
+    Once the database holds more than `max_rows` vectors, the least
+    recently used ones are evicted.
+
+    Args:
+        inner: The Embeddings instance that computes missing vectors.
+        namespace: Cache partition, typically the model name.
+        path: SQLite database file.
+        batch_size: Uncached chunks per inner embed_documents() call;
+            each batch is persisted as soon as it is embedded.
+        concurrency: Batches embedded in parallel threads (defaults to
+            the EMBED_CONCURRENCY environment variable, else 1).
+        max_rows: Cached vectors kept across all namespaces.
+    """
+
+    def __init__(
+        self,
+        inner,
+        namespace,
+        path=EMBED_CACHE_PATH,
+        batch_size=_EMBED_BATCH,
+        concurrency=_EMBED_CONCURRENCY,
+        max_rows=_MAX_ROWS,
+    ):
+        self.inner = inner
+        self.namespace = namespace
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_rows = max_rows
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " namespace TEXT NOT NULL,"
+                " key BLOB NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " last_used REAL NOT NULL DEFAULT 0,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            columns = {
+                row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")
+            }
+            if "last_used" not in columns:
+                # databases written before eviction existed
+                self._conn.execute(
+                    "ALTER TABLE embeddings ADD COLUMN last_used REAL NOT NULL DEFAULT 0"
+                )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+            )
+
+    def _lookup(self, keys):
+        """Return {key: vector} for every key already in the cache, marking them used."""
+        found = {}
+        now = time.time()
+        with self._lock, self._conn:
+            for start in range(0, len(keys), _LOOKUP_BATCH):
+                batch = keys[start:start + _LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    "SELECT key, vector FROM embeddings WHERE namespace = ? "
+                    f"AND key IN ({placeholders})",
+                    (self.namespace, *batch),
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+                if rows:
+                    self._conn.execute(
+                        "UPDATE embeddings SET last_used = ? WHERE namespace = ? "
+                        f"AND key IN ({placeholders})",
+                        (now, self.namespace, *batch),
+                    )
+        return found
+
+    def _store(self, items):
+        """
+        Persist (key, vector) pairs, then evict least-recently-used rows
+        beyond max_rows. Existing keys are left untouched.
+        """
+        now = time.time()
+        rows = [
+            (self.namespace, key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for key, vector in items
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (namespace, key, vector, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            if count > self.max_rows:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN ("
+                    " SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (count - self.max_rows,),
+                )
+                logger.info("Embedding cache: evicted %d stale vectors.", count - self.max_rows)
+
+    def _store_batches(self, key_batches, vector_batches, vectors):
+        """Persist each embedded batch as it arrives and merge it into `vectors`."""
+        for keys, new_vectors in zip(key_batches, vector_batches):
+            fresh = list(zip(keys, new_vectors))
+            self._store(fresh)
+            vectors.update(fresh)
+
+    def embed_documents(self, texts):
+        keys = [
+            content_hasher(text.encode("utf-8", errors="replace")).digest()
+            for text in texts
+        ]
+        vectors = self._lookup(list(set(keys)))
+
+        # first occurrence of every uncached key, in document order
+        missing = {}
+        for i, key in enumerate(keys):
+            if key not in vectors and key not in missing:
+                missing[key] = i
+
+        missing_keys = list(missing)
+        key_batches = [
+            missing_keys[start:start + self.batch_size]
+            for start in range(0, len(missing_keys), self.batch_size)
+        ]
+        text_batches = [[texts[missing[key]] for key in batch] for batch in key_batches]
+
+        if self.concurrency > 1 and len(text_batches) > 1:
+            # torch / ONNX Runtime / HTTP clients release the GIL while encoding
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                results = pool.map(self.inner.embed_documents, text_batches)
+                self._store_batches(key_batches, results, vectors)
+        else:
+            self._store_batches(key_batches, map(self.inner.embed_documents, text_batches), vectors)
+
+        logger.info(
+            "Embedding cache: %d of %d chunks reused, %d embedded.",
+            len(keys) - len(missing), len(keys), len(missing),
+        )
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text):
+        return self.inner.embed_query(text)
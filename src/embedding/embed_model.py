@@ -1,8 +1,8 @@
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from src.embedding.quantized_embed_model import load_quantized_embedding_model
+from src.embedding.cached_embeddings import CachedEmbeddings
+from config.loader import load_config
 from dotenv import load_dotenv
-from pathlib import Path
 import logging
-import yaml
 import os
 
 import warnings
@@ -33,6 +33,9 @@ def load_hf_token():
 
 _embed_model_instance = None
 
+# Default encode batch size per device (override via embedding_model.batch_size)
+_DEFAULT_BATCH_SIZE = {"cuda": 128, "cpu": 32}
+
 
 def get_embedding_model():
     """
@@ -42,11 +45,19 @@ def get_embedding_model():
     calls, avoiding the overhead of re-downloading / re-loading weights
     every time the module is imported.
 
+    With `embedding_model.quantize: int8` in the config, an int8 ONNX
+    Runtime build of the same model is used instead. Document vectors
+    are cached on disk per chunk text unless `embedding_model.cache` is
+    set to false.
+
     Returns:
-        HuggingFaceEmbeddings: A ready-to-use embedding model.
+        Embeddings: HuggingFaceEmbeddings, or QuantizedEmbeddings when
+        int8 quantization is enabled, wrapped in CachedEmbeddings when
+        the embedding cache is enabled.
 
     Raises:
         EnvironmentError: If HF_TOKEN is missing.
+        ImportError: If int8 is requested but optimum is not installed.
         FileNotFoundError: If the config YAML cannot be found.
         ValueError: If the config YAML is missing the embedding model name.
     """
@@ -58,35 +69,63 @@ def get_embedding_model():
     # Validate token before doing anything expensive
     load_hf_token()
 
-    # Locate config
-    BASE_DIR = Path(__file__).resolve().parents[2]
-    config_path = BASE_DIR / "config" / "model.yaml"
-
-    if not config_path.exists():
-        raise FileNotFoundError(
-            f"Configuration file not found at {config_path}"
-        )
-
-    with open(config_path, "r") as file:
-        config = yaml.safe_load(file)
+    embed_cfg = load_config().get("embedding_model", {})
 
-    model_name = config.get("embedding_model", {}).get("model")
+    model_name = embed_cfg.get("model")
     if not model_name:
         raise ValueError(
             "Embedding model name is missing in config/model.yaml "
             "under 'embedding_model.model'."
         )
 
-    use_cuda = config.get("embedding_model", {}).get("cuda", True)
+    quantize = embed_cfg.get("quantize")
+
+    use_cuda = embed_cfg.get("cuda", True)
+    if quantize == "int8" and use_cuda:
+        # the int8 ONNX build only runs on ONNX Runtime's CPU provider
+        logger.info("int8 embeddings run on CPU; ignoring 'embedding_model.cuda'.")
+        use_cuda = False
     device = "cuda" if use_cuda else "cpu"
 
-    logger.info("Loading embedding model '%s' on %s ...", model_name, device)
+    # Larger batches keep the GPU busy; CPU gains little beyond 32
+    batch_size = embed_cfg.get("batch_size", _DEFAULT_BATCH_SIZE[device])
+
+    if quantize == "int8":
+        model = load_quantized_embedding_model(
+            model_name,
+            batch_size=batch_size,
+            pooling=embed_cfg.get("pooling", "cls"),
+        )
+    else:
+        # pulls in sentence-transformers / torch, so only import when used
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+
+        model_kwargs = {"device": device}
+        if device == "cuda":
+            # FP16 weights halve memory traffic on the transformer forward pass
+            model_kwargs["model_kwargs"] = {"torch_dtype": "float16"}
+
+        logger.info(
+            "Loading embedding model '%s' on %s (batch_size=%s) ...",
+            model_name, device, batch_size,
+        )
+
+        model = HuggingFaceEmbeddings(
+            model_name=model_name,
+            model_kwargs=model_kwargs,
+            encode_kwargs={
+                "normalize_embeddings": True,
+                "batch_size": batch_size,
+                "convert_to_numpy": True,
+            },
+        )
+
+        logger.info("Embedding model '%s' initialized successfully.", model_name)
 
-    _embed_model_instance = HuggingFaceEmbeddings(
-        model_name=model_name,
-        model_kwargs={"device": device},
-        encode_kwargs={"normalize_embeddings": True},
-    )
+    if embed_cfg.get("cache", True):
+        # int8 vectors differ slightly, so they get their own namespace
+        namespace = f"{model_name}:{quantize}" if quantize else model_name
+        model = CachedEmbeddings(model, namespace)
 
-    logger.info("Embedding model '%s' initialized successfully.", model_name)
+    _embed_model_instance = model
     return _embed_model_instance
\ No newline at end of file
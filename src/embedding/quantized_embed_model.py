@@ -0,0 +1,119 @@
+from langchain_core.embeddings import Embeddings
+from pathlib import Path
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Exported / quantized ONNX models are cached here between runs
+ONNX_CACHE_DIR = Path(__file__).resolve().parents[2] / ".cache" / "onnx"
+
+_QUANTIZED_FILE = "model_quantized.onnx"
+
+
+class QuantizedEmbeddings(Embeddings):
+    """
+    LangChain Embeddings backed by an int8-quantized ONNX Runtime model.
+
+    Produces L2-normalized sentence vectors, matching what
+    HuggingFaceEmbeddings returns with normalize_embeddings=True.
+
+    Args:
+        model: An optimum ORTModelForFeatureExtraction.
+        tokenizer: The model's HuggingFace tokenizer.
+        batch_size: Texts per ONNX Runtime forward pass.
+        pooling: "cls" (BGE-style) or "mean" token pooling.
+        max_length: Token limit per text; longer inputs are truncated.
+    """
+
+    def __init__(self, model, tokenizer, batch_size=32, pooling="cls", max_length=512):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.batch_size = batch_size
+        self.pooling = pooling
+        self.max_length = max_length
+
+    def _encode(self, texts):
+        inputs = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="np",
+        )
+        hidden = np.asarray(self.model(**inputs).last_hidden_state)
+
+        if self.pooling == "mean":
+            mask = inputs["attention_mask"][..., None].astype(hidden.dtype)
+            vectors = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        else:
+            vectors = hidden[:, 0]
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.clip(norms, 1e-12, None)
+
+    def embed_documents(self, texts):
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self._encode(texts[start:start + self.batch_size]).tolist())
+        return vectors
+
+    def embed_query(self, text):
+        return self._encode([text])[0].tolist()
+
+
+def load_quantized_embedding_model(model_name, batch_size=32, pooling="cls"):
+    """
+    Export a HuggingFace embedding model to ONNX, quantize it to int8,
+    and wrap it as LangChain Embeddings.
+
+    The export and dynamic quantization run once; later calls load the
+    cached model from ONNX_CACHE_DIR. The model always runs on the CPU:
+    the quantization targets AVX-512 VNNI, and its integer MatMul ops
+    have no CUDA kernels.
+
+    Args:
+        model_name: HuggingFace model id (e.g. "BAAI/bge-large-en-v1.5").
+        batch_size: Texts per forward pass.
+        pooling: "cls" or "mean" token pooling.
+
+    Returns:
+        QuantizedEmbeddings: A ready-to-use embedding model.
+
+    Raises:
+        ImportError: If optimum[onnxruntime] is not installed.
+    """
+    try:
+        from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        from transformers import AutoTokenizer
+    except ImportError as exc:
+        raise ImportError(
+            "int8 embedding quantization requires optimum with ONNX Runtime. "
+            "Install it with: pip install 'optimum[onnxruntime]'"
+        ) from exc
+
+    provider = "CPUExecutionProvider"
+    model_dir = ONNX_CACHE_DIR / model_name.replace("/", "__")
+    quantized_dir = model_dir / "int8"
+
+    if not (quantized_dir / _QUANTIZED_FILE).exists():
+        logger.info("Exporting '%s' to ONNX and quantizing to int8 ...", model_name)
+        onnx_model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+        onnx_model.save_pretrained(model_dir)
+
+        quantizer = ORTQuantizer.from_pretrained(onnx_model)
+        quantizer.quantize(
+            save_dir=quantized_dir,
+            quantization_config=AutoQuantizationConfig.avx512_vnni(
+                is_static=False, per_channel=False
+            ),
+        )
+
+    model = ORTModelForFeatureExtraction.from_pretrained(
+        quantized_dir, file_name=_QUANTIZED_FILE, provider=provider
+    )
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    logger.info("Loaded int8 ONNX embedding model '%s' (%s).", model_name, provider)
+    return QuantizedEmbeddings(model, tokenizer, batch_size=batch_size, pooling=pooling)
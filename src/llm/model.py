@@ -1,7 +1,7 @@
 from langchain_ollama import OllamaLLM
-from pathlib import Path
+from config.loader import load_config
 import logging
-import yaml
+import httpx
 
 logger = logging.getLogger(__name__)
 
@@ -9,6 +9,11 @@ logger = logging.getLogger(__name__)
 
 _llm_instance = None
 
+# keep a small pool of warm connections to the Ollama server so each
+# generation reuses a socket instead of opening a new one
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=8, keepalive_expiry=600)
+_HTTP_TIMEOUT = 600.0
+
 
 def get_llm():
     """
@@ -30,19 +35,7 @@ def get_llm():
     if _llm_instance is not None:
         return _llm_instance
 
-    # Locate config
-    BASE_DIR = Path(__file__).resolve().parents[2]
-    config_path = BASE_DIR / "config" / "model.yaml"
-
-    if not config_path.exists():
-        raise FileNotFoundError(
-            f"Configuration file not found at {config_path}"
-        )
-
-    with open(config_path, "r") as file:
-        config = yaml.safe_load(file)
-
-    llm_cfg = config.get("llm_config", {})
+    llm_cfg = load_config().get("llm_config", {})
 
     model_name = llm_cfg.get("model")
     base_url = llm_cfg.get("base_url")
@@ -68,6 +61,9 @@ def get_llm():
         temperature=llm_cfg.get("temperature", 0.5),
         num_ctx=llm_cfg.get("num_ctx", 4096),
         num_gpu=llm_cfg.get("num_gpu", 1),
+        # keep the model resident in VRAM between questions
+        keep_alive=llm_cfg.get("keep_alive", "30m"),
+        client_kwargs={"limits": _HTTP_LIMITS, "timeout": _HTTP_TIMEOUT},
     )
 
     logger.info(
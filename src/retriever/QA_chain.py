@@ -1,38 +1,306 @@
-from langchain_classic.chains.retrieval_qa.base import RetrievalQA
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from collections import OrderedDict
+from pathlib import Path
+import threading
+import hashlib
 import logging
+import queue
 import time
-import sys
-import os
 
-sys.path.append(
-    os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+from src.vectorstore.vectordb import (
+    vector_database,
+    evict_vector_database,
+    vector_retriever,
 )
-
-from vectorstore.vectordb import vector_database
-from document.document_loader import document_loader
-from document.text_splitter import text_splitter
-from llm.model import get_llm
+from src.document.document_loader import document_loader
+from src.document.text_splitter import text_splitter, count_tokens
+from src.embedding.embed_model import get_embedding_model
+from src.llm.model import get_llm
 
 logger = logging.getLogger(__name__)
 
 
+def warm_up():
+    """
+    Initialize the LLM and embedding singletons ahead of the first query.
+
+    Called once at application start-up so the first question does not
+    pay for model loading. Failures are logged rather than raised; the
+    same error then surfaces to the user on their first query.
+    """
+    t0 = time.perf_counter()
+    try:
+        get_embedding_model()
+        get_llm()
+    except Exception as exc:
+        logger.warning("Model warm-up failed: %s", exc)
+        return
+    logger.info("Models warmed up in %.2fs.", time.perf_counter() - t0)
+
+
+# Per-file index cache — skips load/split/embed for repeat questions
+
+_INDEX_CACHE_SIZE = 8
+_FINGERPRINT_BYTES = 1 << 20
+
+_index_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+
+# Per-(file, question) answer cache — repeat questions skip the LLM entirely
+
+_ANSWER_CACHE_SIZE = 256
+
+_answer_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+# Guards both caches; the UI serves several chats concurrently
+_cache_lock = threading.Lock()
+
+# Tokens reserved for the question, prompt template and the answer itself.
+# Context is counted with the embedding model's tokenizer (bge WordPiece),
+# while num_ctx is in LLM tokens; Mistral's SentencePiece splits every
+# digit, so numeric compliance text runs longer on the LLM side. Only
+# _CONTEXT_SAFETY of the remaining window is filled to absorb that gap.
+_PROMPT_HEADROOM_TOKENS = 512
+_CONTEXT_SAFETY = 0.75
+
+# Chunk sizing passed to text_splitter, in embedding-model tokens
+_CHUNK_SIZE_TOKENS = 256
+_CHUNK_OVERLAP_TOKENS = 32
+
+
+class FullDocRetriever(BaseRetriever):
+    """
+    Retriever that returns every chunk of a small document.
+
+    Used instead of a vector store when the whole document fits in the
+    LLM context, so no embedding or similarity search is needed.
+    """
+
+    docs: list[Document]
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        return self.docs
+
+
+def _file_fingerprint(file):
+    """
+    Fingerprint an uploaded PDF by (SHA-256 of first 1 MB, size, mtime).
+
+    Returns None when the file cannot be read, so the caller falls back
+    to the uncached pipeline and document_loader reports the real error.
+    """
+    if file is None:
+        return None
+
+    file_path = Path(file.name) if hasattr(file, "name") else Path(str(file))
+
+    try:
+        stat = file_path.stat()
+        with open(file_path, "rb") as fh:
+            head = fh.read(_FINGERPRINT_BYTES)
+    except OSError:
+        return None
+
+    return (hashlib.sha256(head).hexdigest(), stat.st_size, stat.st_mtime_ns)
+
+
+def _context_budget(llm):
+    """Embedding-model tokens of context that safely fit in the LLM's num_ctx."""
+    num_ctx = getattr(llm, "num_ctx", None) or 2048
+    return int((num_ctx - _PROMPT_HEADROOM_TOKENS) * _CONTEXT_SAFETY)
+
+
+def _fits_in_context(texts, budget):
+    """Return True if all texts together stay within `budget` tokens."""
+    total = 0
+    for text in texts:
+        # stop counting as soon as the budget is blown
+        total += count_tokens(text)
+        if total > budget:
+            return False
+    return True
+
+
+def _build_index(file):
+    """
+    Run load -> split -> embed for a PDF and time each stage.
+
+    Documents whose full text fits in the LLM context (see
+    _context_budget()) skip the vector store entirely.
+
+    Returns:
+        dict: 'retriever' plus page/chunk counts and per-stage timings.
+    """
+    t0 = time.perf_counter()
+    splits = document_loader(file)
+    load_time = round(time.perf_counter() - t0, 2)
+
+    t0 = time.perf_counter()
+    chunks = text_splitter(
+        splits,
+        chunk_size=_CHUNK_SIZE_TOKENS,
+        chunk_overlap=_CHUNK_OVERLAP_TOKENS,
+    )
+    chunk_time = round(time.perf_counter() - t0, 2)
+
+    # small document — the whole text goes into the prompt, skip embedding
+    if _fits_in_context(chunks.texts, _context_budget(get_llm())):
+        docs = [
+            Document(page_content=text, metadata=metadata)
+            for text, metadata in zip(chunks.texts, chunks.metadatas())
+        ]
+        doc_retriever = FullDocRetriever(docs=docs)
+        embed_time = 0.0
+        logger.info("Small document (%d chunks); skipping vector store.", len(chunks))
+    else:
+        t0 = time.perf_counter()
+        vectordb = vector_database(chunks)
+        doc_retriever = vector_retriever(vectordb, k=4)
+        embed_time = round(time.perf_counter() - t0, 2)
+
+    return {
+        "retriever": doc_retriever,
+        "full_doc": isinstance(doc_retriever, FullDocRetriever),
+        "num_pages": len(splits),
+        "num_chunks": len(chunks),
+        "load_time": load_time,
+        "chunk_time": chunk_time,
+        "embed_time": embed_time,
+    }
+
+
+def _get_index(file, fingerprint):
+    """
+    Return the cached index entry for a PDF, building it on a miss.
+
+    Entries are keyed by file fingerprint and evicted least-recently-used
+    once more than _INDEX_CACHE_SIZE documents are held; evicted vector
+    stores are released from the vectorstore cache as well. A None
+    fingerprint bypasses the cache.
+
+    Returns:
+        tuple: (entry_dict, cache_hit)
+    """
+    with _cache_lock:
+        if fingerprint is not None and fingerprint in _index_cache:
+            _index_cache.move_to_end(fingerprint)
+            logger.info("Reusing cached index (sha=%s...).", fingerprint[0][:12])
+            return _index_cache[fingerprint], True
+
+    entry = _build_index(file)
+
+    if fingerprint is not None:
+        with _cache_lock:
+            _index_cache[fingerprint] = entry
+            while len(_index_cache) > _INDEX_CACHE_SIZE:
+                _, evicted = _index_cache.popitem(last=False)
+                if not evicted["full_doc"]:
+                    evict_vector_database(evicted["retriever"].vectorstore)
+
+    return entry, False
+
+
+def _select_chain_type(entry, llm):
+    """
+    Choose the cheapest chain type whose prompt fits the LLM context.
+
+    "stuff" answers in a single LLM call but needs all k retrieved chunks
+    in one prompt; "map_reduce" is the fallback when they would overflow
+    num_ctx. Chunks are sized in tokens, so each retrieved chunk costs at
+    most _CHUNK_SIZE_TOKENS plus _CHUNK_OVERLAP_TOKENS and no extra
+    retrieval pass is needed to estimate the prompt.
+    Small documents served by FullDocRetriever always use "stuff"; they
+    were only routed there because their full text fits the same budget.
+    """
+    if entry["full_doc"]:
+        return "stuff"
+
+    k = entry["retriever"].search_kwargs.get("k", 4)
+    est_tokens = k * (_CHUNK_SIZE_TOKENS + _CHUNK_OVERLAP_TOKENS)
+
+    if est_tokens <= _context_budget(llm):
+        return "stuff"
+    return "map_reduce"
+
+
+def _get_chain(entry, llm, chain_type):
+    """
+    Return the RetrievalQA chain for an index entry, building it on first use.
+
+    Chains are stored on the entry itself, so they share its lifetime and
+    are dropped together when the document is evicted.
+    """
+    chains = entry.setdefault("chains", {})
+    key = (id(llm), chain_type)
+
+    if key not in chains:
+        from langchain_classic.chains.retrieval_qa.base import RetrievalQA
+
+        chains[key] = RetrievalQA.from_chain_type(
+            llm=llm,
+            chain_type=chain_type,
+            retriever=entry["retriever"],
+            return_source_documents=True,
+        )
+    return chains[key]
+
+
+def _whole_document_source(num_pages):
+    """Single source entry for answers generated from the full document."""
+    pages = f"1–{num_pages}" if num_pages > 1 else "1"
+    return {"page": pages, "excerpt": "Whole document passed to the model"}
+
+
+def _normalize_query(query):
+    """Case-fold and collapse whitespace so trivially different phrasings share a key."""
+    return " ".join(query.split()).lower()
+
+
+def clear_qa_cache(file=None):
+    """
+    Forget cached answers, forcing fresh generations.
+
+    Args:
+        file: Only drop answers for this PDF. The cache is shared by every
+            chat session, so per-session callers should always pass it;
+            None clears answers for all documents.
+    """
+    if file is None:
+        with _cache_lock:
+            _answer_cache.clear()
+        logger.info("QA answer cache cleared.")
+        return
+
+    fingerprint = _file_fingerprint(file)
+    if fingerprint is None:
+        return
+
+    with _cache_lock:
+        stale = [key for key in _answer_cache if key[0] == fingerprint]
+        for key in stale:
+            del _answer_cache[key]
+    logger.info("Cleared %d cached answer(s) for sha=%s...", len(stale), fingerprint[0][:12])
+
+
 def retriever(file):
     """
     Build a retriever from an uploaded PDF file.
 
     Pipeline: load PDF -> split text -> embed into vector store -> retriever.
+    The result is cached per file fingerprint, so repeat calls for the
+    same document skip parsing, chunking, and embedding entirely.
 
     Args:
         file: A Gradio file object or file-path string pointing to a PDF.
 
     Returns:
-        VectorStoreRetriever: A retriever backed by the ChromaDB index.
+        BaseRetriever: A retriever over the FAISS index (see
+        vector_retriever()), or a FullDocRetriever for documents small
+        enough to skip it.
     """
-    splits = document_loader(file)
-    chunks = text_splitter(splits)
-    vectordb = vector_database(chunks)
-    return vectordb.as_retriever()
-
+    entry, _ = _get_index(file, _file_fingerprint(file))
+    return entry["retriever"]
 
 def retriever_qa(file, query):
     """
@@ -62,14 +330,8 @@ def retriever_qa(file, query):
 
     try:
         llm = get_llm()
-        retriever_obj = retriever(file)
-
-        qa = RetrievalQA.from_chain_type(
-            llm=llm,
-            chain_type="refine",
-            retriever=retriever_obj,
-            return_source_documents=True,
-        )
+        entry, _ = _get_index(file, _file_fingerprint(file))
+        qa = _get_chain(entry, llm, _select_chain_type(entry, llm))
 
         logger.info("Running QA chain for query: '%s'", query[:80])
         response = qa.invoke({"query": query})
@@ -93,21 +355,105 @@ def retriever_qa(file, query):
             "Please check the logs or try again."
         )
 
+# Token streaming — surfaces LLM tokens while the chain is still running
+
+_STREAM_END = object()
+_STREAM_RESET = object()
+
+
+class _TokenQueueHandler(BaseCallbackHandler):
+    """Forward LLM tokens from the chain's worker thread into a queue."""
+
+    def __init__(self, token_queue):
+        self.token_queue = token_queue
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        # map_reduce makes several LLM calls; only the last one is the answer
+        self.token_queue.put(_STREAM_RESET)
+
+    def on_llm_new_token(self, token, **kwargs):
+        self.token_queue.put(token)
+
+
+def _stream_chain(qa, query):
+    """
+    Run a QA chain in a worker thread and stream its answer.
+
+    OllamaLLM streams from the server internally and reports each chunk
+    through on_llm_new_token, so tokens are available long before
+    qa.invoke() returns.
+
+    Yields:
+        tuple: (partial_answer, None) whenever new tokens arrived, then
+               (final_answer, chain_response) once the chain finishes.
+
+    Raises:
+        Exception: Whatever the chain raised, re-raised in the caller.
+    """
+    token_queue = queue.Queue()
+    outcome = {}
+
+    def run():
+        try:
+            outcome["response"] = qa.invoke(
+                {"query": query},
+                config={"callbacks": [_TokenQueueHandler(token_queue)]},
+            )
+        except Exception as exc:
+            outcome["error"] = exc
+        finally:
+            token_queue.put(_STREAM_END)
+
+    threading.Thread(target=run, daemon=True).start()
+
+    # tokens go into a list and are joined once per yield; everything that
+    # queued up while the consumer was busy is drained into one update
+    buf = []
+    done = False
+    while not done:
+        tokens = [token_queue.get()]
+        while not token_queue.empty():
+            tokens.append(token_queue.get_nowait())
+
+        grew = False
+        for token in tokens:
+            if token is _STREAM_END:
+                done = True
+                break
+            if token is _STREAM_RESET:
+                buf.clear()
+                grew = False
+                continue
+            buf.append(token)
+            grew = True
+
+        if grew and not done:
+            yield ("".join(buf), None)
+
+    if "error" in outcome:
+        raise outcome["error"]
+
+    response = outcome["response"]
+    yield (response["result"], response)
+
+
 # Metadata QA — returns answer + sources + per-step timing
 
-def retriever_qa_with_metadata(file, query):
+def retriever_qa_stream(file, query):
     """
-    End-to-end QA with per-step timing, source attribution, and metrics.
+    Streaming end-to-end QA with per-step timing and source attribution.
 
     Args:
         file: A Gradio file path string or file object pointing to a PDF.
         query: The natural-language question to answer.
 
-    Returns:
+    Yields:
         tuple: (answer_text, source_excerpts, metrics_dict)
-            - answer_text (str): The LLM-generated answer or error message.
-            - source_excerpts (list[dict]): Each dict has 'page' and 'excerpt'.
-            - metrics_dict (dict): Timing and count metrics for the pipeline.
+            While the answer is being generated, answer_text is the
+            partial answer and source_excerpts is None. The last tuple
+            is the final result, identical in shape to the return value
+            of retriever_qa_with_metadata(). Validation and pipeline
+            errors are yielded as a single final tuple.
     """
     metrics = {}
 
@@ -117,51 +463,57 @@ def retriever_qa_with_metadata(file, query):
 
     # input validation
     if file is None:
-        return ("Please upload a PDF document before asking a question.", [], metrics)
+        yield ("Please upload a PDF document before asking a question.", [], metrics)
+        return
 
     if not query or not query.strip():
-        return ("Please enter a question about the document.", [], metrics)
+        yield ("Please enter a question about the document.", [], metrics)
+        return
 
     query = query.strip()
 
     if len(query) > 2000:
-        return ("Your question is too long (max 2,000 characters).", [], metrics)
+        yield ("Your question is too long (max 2,000 characters).", [], metrics)
+        return
+
+    t_start = time.perf_counter()
+    fingerprint = _file_fingerprint(file)
+    cache_key = (fingerprint, _normalize_query(query)) if fingerprint else None
+
+    # repeat question on the same document — answer from cache
+    with _cache_lock:
+        cached = _answer_cache.get(cache_key)
+        if cached is not None:
+            _answer_cache.move_to_end(cache_key)
+
+    if cached is not None:
+        answer, sources, cached_metrics = cached
+        metrics.update(cached_metrics)
+        for stage in ("load_time", "chunk_time", "embed_time", "generation_time"):
+            metrics[stage] = 0.0
+        metrics["total_latency"] = round(time.perf_counter() - t_start, 2)
+        logger.info("Answer cache hit for query: '%s'", query[:80])
+        yield (answer, list(sources), metrics)
+        return
 
     # instrumented RAG pipeline 
     try:
-        t_start = time.perf_counter()
-
-        # Load PDF
-        t0 = time.perf_counter()
-        splits = document_loader(file)
-        metrics["load_time"] = round(time.perf_counter() - t0, 2)
-        metrics["num_pages"] = len(splits)
-
-        # Chunk text
-        t0 = time.perf_counter()
-        chunks = text_splitter(splits)
-        metrics["chunk_time"] = round(time.perf_counter() - t0, 2)
-        metrics["num_chunks"] = len(chunks)
-
-        # Embed & index into vector store
-        t0 = time.perf_counter()
-        vectordb = vector_database(chunks)
-        metrics["embed_time"] = round(time.perf_counter() - t0, 2)
+        # Load, chunk & embed (cached per file — zero cost on repeat queries)
+        entry, cache_hit = _get_index(file, fingerprint)
+        metrics["num_pages"] = entry["num_pages"]
+        metrics["num_chunks"] = entry["num_chunks"]
+        for stage in ("load_time", "chunk_time", "embed_time"):
+            metrics[stage] = 0.0 if cache_hit else entry[stage]
 
         # Retrieve & generate answer
         t0 = time.perf_counter()
         llm = get_llm()
-        retriever_obj = vectordb.as_retriever()
-
-        qa = RetrievalQA.from_chain_type(
-            llm=llm,
-            chain_type="refine",
-            retriever=retriever_obj,
-            return_source_documents=True,
-        )
+        qa = _get_chain(entry, llm, _select_chain_type(entry, llm))
 
         logger.info("Running QA chain for query: '%s'", query[:80])
-        response = qa.invoke({"query": query})
+        for answer, response in _stream_chain(qa, query):
+            if response is None:
+                yield (answer, None, metrics)
         metrics["generation_time"] = round(time.perf_counter() - t0, 2)
         metrics["total_latency"] = round(time.perf_counter() - t_start, 2)
 
@@ -171,25 +523,35 @@ def retriever_qa_with_metadata(file, query):
 
         sources = []
         seen_pages = set()
-        for doc in source_docs:
-            page = doc.metadata.get("page", "?")
-            if page in seen_pages:
-                continue
-            seen_pages.add(page)
-            sources.append({
-                "page": page,
-                "excerpt": doc.page_content[:200].strip(),
-            })
-
-        return (response["result"], sources, metrics)
+        if entry["full_doc"]:
+            # every chunk was in the prompt; citing them all says nothing
+            sources.append(_whole_document_source(entry["num_pages"]))
+        else:
+            for doc in source_docs:
+                page = doc.metadata.get("page", "?")
+                if page in seen_pages:
+                    continue
+                seen_pages.add(page)
+                sources.append({
+                    "page": page,
+                    "excerpt": doc.page_content[:200].strip(),
+                })
+
+        if cache_key is not None:
+            with _cache_lock:
+                _answer_cache[cache_key] = (answer, tuple(sources), dict(metrics))
+                while len(_answer_cache) > _ANSWER_CACHE_SIZE:
+                    _answer_cache.popitem(last=False)
+
+        yield (answer, sources, metrics)
 
     except (ValueError, FileNotFoundError) as exc:
         logger.warning("Validation error: %s", exc)
-        return (f"Input error: {exc}", [], metrics)
+        yield (f"Input error: {exc}", [], metrics)
 
     except ConnectionError as exc:
         logger.error("Connection error: %s", exc)
-        return (
+        yield (
             "Could not connect to the Ollama server. "
             "Please ensure Ollama is running.",
             [],
@@ -198,4 +560,27 @@ def retriever_qa_with_metadata(file, query):
 
     except Exception as exc:
         logger.exception("Unexpected error in QA pipeline.")
-        return (f"An unexpected error occurred: {exc}", [], metrics)
+        yield (f"An unexpected error occurred: {exc}", [], metrics)
+
+
+def retriever_qa_with_metadata(file, query):
+    """
+    End-to-end QA with per-step timing, source attribution, and metrics.
+
+    Blocking wrapper around retriever_qa_stream() that returns only the
+    final result.
+
+    Args:
+        file: A Gradio file path string or file object pointing to a PDF.
+        query: The natural-language question to answer.
+
+    Returns:
+        tuple: (answer_text, source_excerpts, metrics_dict)
+            - answer_text (str): The LLM-generated answer or error message.
+            - source_excerpts (list[dict]): Each dict has 'page' and 'excerpt'.
+            - metrics_dict (dict): Timing and count metrics for the pipeline.
+    """
+    result = None
+    for result in retriever_qa_stream(file, query):
+        pass
+    return result
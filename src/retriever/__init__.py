@@ -1,5 +1,8 @@
 __all__ = [
     "retriever_qa",
     "retriever_qa_with_metadata",
+    "retriever_qa_stream",
     "retriever",
+    "warm_up",
+    "clear_qa_cache",
 ]
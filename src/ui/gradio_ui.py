@@ -1,34 +1,51 @@
 """
 ComplianceDoc AI — Prometheus Legal HUD Interface
 dark + cyan medical document analysis console.
-Chat-style interaction, typewriter streaming, live telemetry sidebar.
+Chat-style interaction, live token streaming, live telemetry sidebar.
 """
 
 import gradio as gr
+import asyncio
+import itertools
 import logging
+import shutil
+import atexit
 import tempfile
+import re
+import threading
 import time
-import yaml
-from datetime import datetime
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
-import sys
 import os
 
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from retriever.QA_chain import retriever_qa_with_metadata
+from src.retriever.QA_chain import retriever_qa_stream, warm_up, clear_qa_cache
+from config.loader import load_config
 
 logger = logging.getLogger(__name__)
 
-# Stream tuning
-_STREAM_CHUNK = 3     # words per yield
-_STREAM_DELAY = 0.02  # seconds between yields
+# Stream tuning — each yield re-renders the whole chatbot in the browser
+_STREAM_INTERVAL = 0.05   # min seconds between partial-answer yields
+_STREAM_MAX_PENDING = 15  # flush early once this many updates are pending
+# every partial re-sends the whole answer, so long answers refresh less often
+_STREAM_LARGE_CHARS = 2000     # ~300 words
+_STREAM_LARGE_INTERVAL = 0.25
+
+# Request queue — concurrent chats share the event loop, blocking steps run in threads
+_QUEUE_CONCURRENCY = 4
+_QUEUE_MAX_SIZE = 32
 
 # SYSTEM LEVEL DETECTION
-def _get_system_info():
-    """Detect runtime hardware and read model configuration."""
-    info = {}
 
-    # GPU / Device detection
+# filled in by a background probe so importing torch never blocks the UI
+_HW_INFO = {"device": "DETECTING", "gpu_name": "N/A", "vram": "N/A"}
+_HW_READY = threading.Event()
+_hw_probe_thread = None
+
+
+def _probe_hardware():
+    """Detect the compute device and GPU memory, then publish into _HW_INFO."""
+    info = {}
     try:
         import torch
         info["device"] = "CUDA" if torch.cuda.is_available() else "CPU"
@@ -46,150 +63,203 @@ def _get_system_info():
         info["gpu_name"] = "N/A"
         info["vram"] = "N/A"
 
-    # Read model config 
-    config_path = Path(__file__).resolve().parents[2] / "config" / "model.yaml"
+    _HW_INFO.update(info)
+    _HW_READY.set()
+
+
+def _start_hardware_probe():
+    """Start the hardware probe once; HD_SKIP_GPU_PROBE=1 skips torch entirely."""
+    global _hw_probe_thread
+
+    if _HW_READY.is_set() or _hw_probe_thread is not None:
+        return
+
+    if os.environ.get("HD_SKIP_GPU_PROBE"):
+        _HW_INFO.update({"device": "CPU", "gpu_name": "N/A", "vram": "N/A"})
+        _HW_READY.set()
+        return
+
+    _hw_probe_thread = threading.Thread(target=_probe_hardware, daemon=True)
+    _hw_probe_thread.start()
+
+
+@lru_cache(maxsize=1)
+def _get_model_info():
+    """Read the model settings shown in the sidebar (once per process)."""
     try:
-        with open(config_path, "r") as f:
-            config = yaml.safe_load(f)
+        config = load_config()
         llm = config.get("llm_config", {})
         emb = config.get("embedding_model", {})
-        info["llm_model"] = llm.get("model", "Unknown")
-        info["llm_url"] = llm.get("base_url", "Unknown")
-        info["temperature"] = llm.get("temperature", "N/A")
-        info["num_ctx"] = llm.get("num_ctx", "N/A")
-        info["embed_model"] = emb.get("model", "Unknown")
+        return {
+            "llm_model": llm.get("model", "Unknown"),
+            "llm_url": llm.get("base_url", "Unknown"),
+            "temperature": llm.get("temperature", "N/A"),
+            "num_ctx": llm.get("num_ctx", "N/A"),
+            "embed_model": emb.get("model", "Unknown"),
+        }
     except Exception:
-        info.update({
+        return {
             "llm_model": "Unknown", "llm_url": "Unknown",
             "temperature": "N/A", "num_ctx": "N/A", "embed_model": "Unknown",
-        })
+        }
+
+
+def _get_system_info():
+    """Return runtime hardware and model configuration.
 
-    return info
+    Hardware fields read "DETECTING" until the background probe started
+    by _start_hardware_probe() has finished.
+    """
+    return {**_HW_INFO, **_get_model_info()}
 
 
 # HTML / CSS BUILDERS
+@lru_cache(maxsize=32)
 def _short_name(name):
     """Shorten 'org/model-name' to 'model-name'."""
-    return name.split("/")[-1] if "/" in str(name) else str(name)
-
-
-def _metric_row(label, value, color=None):
-    """Single key-value row for the telemetry panel."""
-    val_color = color if color else "var(--hd-text)"
-    return (
-        f'<div style="display:flex;justify-content:space-between;'
-        f'align-items:center;margin-bottom:8px;">'
-        f'<span style="color:var(--hd-text2);font-size:10px;letter-spacing:1.5px;">'
-        f'{label}</span>'
-        f'<span style="color:{val_color};font-size:11px;font-weight:500;">'
-        f'{value}</span></div>'
-    )
+    return str(name).rpartition("/")[2]
 
 
-def _build_metrics_html(sys_info, query_metrics=None, status="STANDBY"):
-    """Build the full telemetry sidebar as self-contained HTML."""
+def _metric_row(parts, label, value, color=None):
+    """Append a single key-value row for the telemetry panel to `parts`."""
+    parts.extend((
+        '<div class="hd-metric-row"><span class="hd-metric-label">',
+        label,
+        '</span><span class="hd-metric-value"',
+        f' style="color:{color};">' if color else ">",
+        str(value),
+        "</span></div>",
+    ))
 
-    palette = {
-        "STANDBY":    ("#f0b429", ""),
-        "PROCESSING": ("#00d4ff", "animation:hd-pulse 1.5s infinite;"),
-        "COMPLETE":   ("#00d4ff", ""),
-        "ERROR":      ("#ff4757", ""),
-    }
-    color, anim = palette.get(status, ("#f0b429", ""))
 
-    # query metrics block
+def _section_title(parts, title):
+    """Append a telemetry section heading with its divider line to `parts`."""
+    parts.extend((
+        '<div class="hd-section-title">', title, '</div><div class="hd-section-hr"></div>',
+    ))
+
+
+# fixed wrapper around the telemetry panel; styling lives in _CSS so each
+# streamed refresh only ships class names
+_METRICS_HEAD = '<div class="hd-telemetry-box">'
+
+_METRICS_TAIL = "</div>"
+
+
+def _build_query_block(parts, query_metrics=None):
+    """Append the per-query analysis section of the telemetry sidebar to `parts`.
+
+    Only used at import time to render _Q_BLOCK_EMPTY and _Q_BLOCK_TEMPLATE.
+    """
+    parts.append('<div class="hd-section">')
+    _section_title(parts, "QUERY ANALYSIS")
+
     if query_metrics:
         qm = query_metrics
-        q_block = f"""
-        <div style="margin-top:22px;">
-          <div style="color:var(--hd-text2);font-size:9px;letter-spacing:3px;
-                      margin-bottom:10px;">QUERY ANALYSIS</div>
-          <div style="height:1px;background:linear-gradient(90deg,
-                      var(--hd-border-h),transparent);margin-bottom:12px;"></div>
-          {_metric_row("LATENCY",   f'{qm.get("total_latency","--")}s', "var(--hd-cyan)")}
-          {_metric_row("PAGES",     str(qm.get("num_pages","--")))}
-          {_metric_row("CHUNKS",    str(qm.get("num_chunks","--")))}
-          {_metric_row("SOURCES",   str(qm.get("num_sources","--")))}
-          <div style="height:6px;"></div>
-          <div style="color:var(--hd-text2);font-size:9px;letter-spacing:3px;
-                      margin-bottom:10px;">PIPELINE BREAKDOWN</div>
-          <div style="height:1px;background:linear-gradient(90deg,
-                      var(--hd-border-h),transparent);margin-bottom:12px;"></div>
-          {_metric_row("LOAD",     f'{qm.get("load_time","--")}s')}
-          {_metric_row("CHUNK",    f'{qm.get("chunk_time","--")}s')}
-          {_metric_row("EMBED",    f'{qm.get("embed_time","--")}s')}
-          {_metric_row("GENERATE", f'{qm.get("generation_time","--")}s')}
-        </div>"""
+        _metric_row(parts, "LATENCY", f'{qm.get("total_latency","--")}s', "var(--hd-cyan)")
+        _metric_row(parts, "PAGES",   qm.get("num_pages", "--"))
+        _metric_row(parts, "CHUNKS",  qm.get("num_chunks", "--"))
+        _metric_row(parts, "SOURCES", qm.get("num_sources", "--"))
+        parts.append('<div class="hd-spacer"></div>')
+        _section_title(parts, "PIPELINE BREAKDOWN")
+        _metric_row(parts, "LOAD",     f'{qm.get("load_time","--")}s')
+        _metric_row(parts, "CHUNK",    f'{qm.get("chunk_time","--")}s')
+        _metric_row(parts, "EMBED",    f'{qm.get("embed_time","--")}s')
+        _metric_row(parts, "GENERATE", f'{qm.get("generation_time","--")}s')
     else:
-        q_block = f"""
-        <div style="margin-top:22px;">
-          <div style="color:var(--hd-text2);font-size:9px;letter-spacing:3px;
-                      margin-bottom:10px;">QUERY ANALYSIS</div>
-          <div style="height:1px;background:linear-gradient(90deg,
-                      var(--hd-border-h),transparent);margin-bottom:12px;"></div>
-          {_metric_row("LATENCY", "--")}
-          {_metric_row("CHUNKS",  "--")}
-          {_metric_row("SOURCES", "--")}
-          <div style="margin-top:14px;color:var(--hd-text3);font-size:10px;
-                      font-style:italic;">Awaiting query...</div>
-        </div>"""
-
-    return f"""
-    <style>
-      @keyframes hd-pulse {{
-        0%,100% {{ opacity:1; }}
-        50%     {{ opacity:0.25; }}
-      }}
-    </style>
-    <div style="
-        font-family:'JetBrains Mono','Consolas',monospace;
-        padding:18px 16px;
-        background:var(--hd-tel-bg);
-        border:1px solid var(--hd-border);
-        border-radius:8px;
-        backdrop-filter:blur(12px);
-        box-sizing:border-box;
-        width:100%;
-    ">
-      <!-- header -->
-      <div style="display:flex;align-items:center;gap:10px;margin-bottom:22px;">
-        <div style="width:7px;height:7px;border-radius:50%;
-                    background:{color};box-shadow:0 0 10px {color};{anim}"></div>
-        <span style="color:var(--hd-cyan);font-size:10px;letter-spacing:3px;
-                     font-weight:600;">SYSTEM TELEMETRY</span>
-      </div>
-
-      <!-- infrastructure -->
-      <div>
-        <div style="color:var(--hd-text2);font-size:9px;letter-spacing:3px;
-                    margin-bottom:10px;">INFRASTRUCTURE</div>
-        <div style="height:1px;background:linear-gradient(90deg,
-                    var(--hd-border-h),transparent);margin-bottom:12px;"></div>
-        {_metric_row("STATUS",  f"● {status}", color)}
-        {_metric_row("DEVICE",  sys_info.get("device","N/A"))}
-        {_metric_row("GPU",     _short_name(sys_info.get("gpu_name","N/A")))}
-        {_metric_row("VRAM",    sys_info.get("vram","N/A"))}
-      </div>
-
-      <!-- models -->
-      <div style="margin-top:22px;">
-        <div style="color:var(--hd-text2);font-size:9px;letter-spacing:3px;
-                    margin-bottom:10px;">MODELS</div>
-        <div style="height:1px;background:linear-gradient(90deg,
-                    var(--hd-border-h),transparent);margin-bottom:12px;"></div>
-        {_metric_row("LLM",        _short_name(sys_info.get("llm_model","N/A")))}
-        {_metric_row("EMBEDDINGS", _short_name(sys_info.get("embed_model","N/A")))}
-        {_metric_row("TEMPERATURE",str(sys_info.get("temperature","N/A")))}
-        {_metric_row("CTX WINDOW", str(sys_info.get("num_ctx","N/A")))}
-      </div>
-
-      {q_block}
-    </div>"""
+        _metric_row(parts, "LATENCY", "--")
+        _metric_row(parts, "CHUNKS",  "--")
+        _metric_row(parts, "SOURCES", "--")
+        parts.append('<div class="hd-awaiting">Awaiting query...</div>')
 
+    parts.append("</div>")
 
-def _get_css():
-    """Return the full custom CSS for the Prometheus HUD theme."""
-    return """
+
+# query block variants, rendered once; the populated one is a str.format
+# template with one placeholder per metric
+_QM_KEYS = (
+    "total_latency", "num_pages", "num_chunks", "num_sources",
+    "load_time", "chunk_time", "embed_time", "generation_time",
+)
+
+_q_parts = []
+_build_query_block(_q_parts)
+_Q_BLOCK_EMPTY = "".join(_q_parts)
+
+_q_parts = []
+_build_query_block(_q_parts, {key: "{%s}" % key for key in _QM_KEYS})
+_Q_BLOCK_TEMPLATE = "".join(_q_parts)
+del _q_parts
+
+
+@lru_cache(maxsize=8)
+def _build_static_shell(sys_items):
+    """Build the hardware and model rows, which never change for a process.
+
+    Args:
+        sys_items: sys_info as a hashable tuple of (key, value) pairs.
+    """
+    sys_info = dict(sys_items)
+    parts = []
+    _metric_row(parts, "DEVICE", sys_info.get("device", "N/A"))
+    _metric_row(parts, "GPU",    _short_name(sys_info.get("gpu_name", "N/A")))
+    _metric_row(parts, "VRAM",   sys_info.get("vram", "N/A"))
+    parts.append('</div><div class="hd-section">')
+    _section_title(parts, "MODELS")
+    _metric_row(parts, "LLM",         _short_name(sys_info.get("llm_model", "N/A")))
+    _metric_row(parts, "EMBEDDINGS",  _short_name(sys_info.get("embed_model", "N/A")))
+    _metric_row(parts, "TEMPERATURE", sys_info.get("temperature", "N/A"))
+    _metric_row(parts, "CTX WINDOW",  sys_info.get("num_ctx", "N/A"))
+    parts.append("</div>")
+    return "".join(parts)
+
+
+_STATUS_PALETTE = {
+    "STANDBY":    ("#f0b429", ""),
+    "PROCESSING": ("#00d4ff", "animation:hd-pulse 1.5s infinite;"),
+    "COMPLETE":   ("#00d4ff", ""),
+    "ERROR":      ("#ff4757", ""),
+}
+
+
+def _build_metrics_html(sys_info, query_metrics=None, status="STANDBY"):
+    """Build the full telemetry sidebar HTML (styled by the hd-* classes in _CSS)."""
+    color, anim = _STATUS_PALETTE.get(status, _STATUS_PALETTE["STANDBY"])
+
+    parts = [
+        _METRICS_HEAD,
+        # header
+        '<div class="hd-tel-header"><div class="hd-status-dot" style="background:',
+        color, ';box-shadow:0 0 10px ', color, ';', anim, '"></div>'
+        '<span class="hd-tel-title">SYSTEM TELEMETRY</span></div>'
+        # infrastructure
+        '<div>',
+    ]
+    _section_title(parts, "INFRASTRUCTURE")
+    _metric_row(parts, "STATUS", f"● {status}", color)
+    parts.append(_build_static_shell(tuple(sorted(sys_info.items()))))
+    if query_metrics:
+        parts.append(_Q_BLOCK_TEMPLATE.format(
+            **{key: query_metrics.get(key, "--") for key in _QM_KEYS}
+        ))
+    else:
+        parts.append(_Q_BLOCK_EMPTY)
+    parts.append(_METRICS_TAIL)
+    return "".join(parts)
+
+
+
+@lru_cache(maxsize=4)
+def _standby_metrics(sys_items):
+    """Return the idle (STANDBY) telemetry panel for a given sys_info.
+
+    Args:
+        sys_items: sys_info as a hashable tuple of (key, value) pairs.
+    """
+    return _build_metrics_html(dict(sys_items))
+
+# Full custom CSS for the Prometheus HUD theme (readable source; minified below)
+_CSS_RAW = """
     /* ═══════════════════════════════════════════════
        COMPLIANCE AI — DUAL-THEME SYSTEM
        Dark = Prometheus HUD  /  Light = Clinical White
@@ -673,40 +743,160 @@ def _get_css():
       gap: 12px !important;
     }
 
+    /* -- telemetry panel -- */
+    .hd-telemetry-box {
+      font-family: 'JetBrains Mono', 'Consolas', monospace;
+      padding: 18px 16px;
+      background: var(--hd-tel-bg);
+      border: 1px solid var(--hd-border);
+      border-radius: 8px;
+      backdrop-filter: blur(12px);
+      box-sizing: border-box;
+      width: 100%;
+    }
+    .hd-tel-header {
+      display: flex;
+      align-items: center;
+      gap: 10px;
+      margin-bottom: 22px;
+    }
+    .hd-status-dot {
+      width: 7px;
+      height: 7px;
+      border-radius: 50%;
+    }
+    .hd-tel-title {
+      color: var(--hd-cyan);
+      font-size: 10px;
+      letter-spacing: 3px;
+      font-weight: 600;
+    }
+    .hd-section { margin-top: 22px; }
+    .hd-section-title {
+      color: var(--hd-text2);
+      font-size: 9px;
+      letter-spacing: 3px;
+      margin-bottom: 10px;
+    }
+    .hd-section-hr {
+      height: 1px;
+      background: linear-gradient(90deg, var(--hd-border-h), transparent);
+      margin-bottom: 12px;
+    }
+    .hd-metric-row {
+      display: flex;
+      justify-content: space-between;
+      align-items: center;
+      margin-bottom: 8px;
+    }
+    .hd-metric-label {
+      color: var(--hd-text2);
+      font-size: 10px;
+      letter-spacing: 1.5px;
+    }
+    .hd-metric-value {
+      color: var(--hd-text);
+      font-size: 11px;
+      font-weight: 500;
+    }
+    .hd-spacer { height: 6px; }
+    .hd-awaiting {
+      margin-top: 14px;
+      color: var(--hd-text3);
+      font-size: 10px;
+      font-style: italic;
+    }
+
+    /* -- header -- */
+    #hd-header-wrap {
+      display: flex;
+      flex-direction: column;
+      align-items: center;
+      padding: 20px 16px 16px;
+      margin-bottom: 8px;
+      border-bottom: 1px solid var(--hd-border);
+      text-align: center;
+      position: relative;
+    }
+    .hd-header-row {
+      display: flex;
+      align-items: center;
+      gap: 12px;
+      justify-content: center;
+    }
+    .hd-header-dot {
+      width: 10px;
+      height: 10px;
+      border-radius: 50%;
+      background: var(--hd-header-dot);
+      box-shadow: var(--hd-header-dot-shadow);
+    }
+    .hd-header-title {
+      color: var(--hd-cyan);
+      font-size: 1.45rem;
+      font-weight: 700;
+      letter-spacing: 0.12em;
+      font-family: 'Inter', system-ui, sans-serif;
+    }
+    .hd-header-sub {
+      color: var(--hd-text2);
+      font-size: 0.72rem;
+      letter-spacing: 0.22em;
+      text-transform: uppercase;
+      margin-top: 6px;
+    }
+    .hd-header-tag {
+      color: var(--hd-text3);
+      font-size: 0.60rem;
+      letter-spacing: 0.18em;
+      text-transform: uppercase;
+      margin-top: 4px;
+    }
+
     /* -- animations -- */
+    @keyframes hd-pulse {
+      0%,100% { opacity: 1; }
+      50%     { opacity: 0.25; }
+    }
     @keyframes hd-glow-border {
       0%,100% { box-shadow: 0 0 5px rgba(0,212,255,0.05); }
       50%     { box-shadow: 0 0 15px rgba(0,212,255,0.12); }
     }
     """
 
+
+_CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.DOTALL)
+_CSS_SPACE_RE = re.compile(r"\s+")
+_CSS_PUNCT_RE = re.compile(r"\s*([{}:;,>])\s*")
+
+
+def _minify_css(css):
+    """Drop comments and collapse whitespace so less CSS is shipped per page load."""
+    css = _CSS_COMMENT_RE.sub("", css)
+    css = _CSS_SPACE_RE.sub(" ", css)
+    return _CSS_PUNCT_RE.sub(r"\1", css).strip()
+
+
+_CSS = _minify_css(_CSS_RAW)
+
+
+def _get_css():
+    """Return the full custom CSS for the Prometheus HUD theme."""
+    return _CSS
+
+
 # HEADER & FOOTER HTML
 _HEADER_HTML = """
-<div id="hd-header-wrap" style="
-    display:flex; flex-direction:column; align-items:center;
-    padding:20px 16px 16px; margin-bottom:8px;
-    border-bottom:1px solid var(--hd-border);
-    text-align:center;
-    position:relative;
-">
-  <div style="display:flex; align-items:center; gap:12px; justify-content:center;">
-    <div style="width:10px;height:10px;border-radius:50%;
-                background:var(--hd-header-dot);
-                box-shadow:var(--hd-header-dot-shadow);"></div>
-    <span style="color:var(--hd-cyan);font-size:1.45rem;font-weight:700;
-                 letter-spacing:0.12em;font-family:'Inter',system-ui,sans-serif;">
-      Risk & Compliance Cyber-AI
-    </span>
-    <div style="width:10px;height:10px;border-radius:50%;
-                background:var(--hd-header-dot);
-                box-shadow:var(--hd-header-dot-shadow);"></div>
+<div id="hd-header-wrap">
+  <div class="hd-header-row">
+    <div class="hd-header-dot"></div>
+    <span class="hd-header-title">Risk & Compliance Cyber-AI</span>
+    <div class="hd-header-dot"></div>
   </div>
-  <div style="color:var(--hd-text2);font-size:0.72rem;letter-spacing:0.22em;
-              text-transform:uppercase;margin-top:6px;">
+  <div class="hd-header-sub">
     Intelligent Risk and Compliance Cyber Document Analysis System
   </div>
-  <div style="color:var(--hd-text3);font-size:0.60rem;letter-spacing:0.18em;
-              text-transform:uppercase;margin-top:4px;">
+  <div class="hd-header-tag">
     v1.0 // RESEARCH USE ONLY
   </div>
 </div>
@@ -725,12 +915,74 @@ _FOOTER_HTML = """
     Always consult a qualified compliance professional for legal advice.
   </div>
   <div style="color:var(--hd-text3);font-size:0.62rem;letter-spacing:0.12em;white-space:nowrap;">
-    POWERED BY OLLAMA + LANGCHAIN + CHROMADB
+    POWERED BY OLLAMA + LANGCHAIN + FAISS
   </div>
 </div>
 """
 
+# one Q&A section of the exported report (lines are joined with "\n")
+_REPORT_QA_BLOCK = "## Query %d\n\n**Q:** %s\n\n**A:** %s\n\n---\n"
+
+# exported reports share one per-process directory, removed at exit;
+# only the most recent _MAX_REPORTS files are kept on disk
+_MAX_REPORTS = 20
+_REPORT_DIR = tempfile.mkdtemp(prefix="compliance_reports_")
+atexit.register(shutil.rmtree, _REPORT_DIR, ignore_errors=True)
+_report_paths = deque()
+_report_counter = itertools.count(1)
+
+
+# THEME
+@lru_cache(maxsize=1)
+def _get_theme():
+    """Build the Gradio theme once per process (fonts, hues, base colours)."""
+    return gr.themes.Base(
+        primary_hue=gr.themes.colors.cyan,
+        secondary_hue=gr.themes.colors.slate,
+        neutral_hue=gr.themes.colors.slate,
+        font=[
+            gr.themes.GoogleFont("Inter"),
+            "system-ui",
+            "sans-serif",
+        ],
+        font_mono=[
+            gr.themes.GoogleFont("JetBrains Mono"),
+            "Consolas",
+            "monospace",
+        ],
+    ).set(
+        body_background_fill="#040810",
+        body_background_fill_dark="#040810",
+        block_background_fill="transparent",
+        block_background_fill_dark="transparent",
+        block_border_color="transparent",
+        block_border_color_dark="transparent",
+        input_background_fill="#0a1018",
+        input_background_fill_dark="#0a1018",
+        body_text_color="#c8d6e5",
+        body_text_color_dark="#c8d6e5",
+        body_text_color_subdued="#6b8299",
+        body_text_color_subdued_dark="#6b8299",
+    )
+
+
 # EVENT HANDLERS (module-level, stateless)
+_SOURCES_HEADING = "\n\n---\n**Sources Referenced:**\n"
+_SOURCE_LINE = "\n> **Page {}** — *{} ...*\n"
+
+
+def _format_sources(sources):
+    """Render source excerpts as the Markdown footer appended to an answer."""
+    # pages are zero-based ints from the loader; anything else is shown as-is
+    return _SOURCES_HEADING + "".join([
+        _SOURCE_LINE.format(
+            src["page"] + 1 if isinstance(src["page"], int) else src["page"],
+            src["excerpt"][:160],
+        )
+        for src in sources
+    ])
+
+
 def _user_message(message, chat_history):
     """Append user message to history and clear the input box."""
     if not message or not message.strip():
@@ -777,7 +1029,9 @@ def _generate_report(chat_history, file):
 
     # Build the markdown
     doc_name = Path(file).name if file else "Unknown document"
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    # one timestamp for both the header and the file name
+    t = time.localtime()
+    now = time.strftime("%Y-%m-%d %H:%M:%S", t)
 
     lines = [
         "# ComplianceDoc AI — Analysis Report",
@@ -790,15 +1044,10 @@ def _generate_report(chat_history, file):
         "",
     ]
 
-    for i, (question, answer) in enumerate(qa_pairs, 1):
-        lines.append(f"## Query {i}")
-        lines.append("")
-        lines.append(f"**Q:** {question}")
-        lines.append("")
-        lines.append(f"**A:** {answer}")
-        lines.append("")
-        lines.append("---")
-        lines.append("")
+    lines.extend(
+        _REPORT_QA_BLOCK % (i, question, answer)
+        for i, (question, answer) in enumerate(qa_pairs, 1)
+    )
 
     lines.extend([
         "*This report was generated by ComplianceDoc AI. "
@@ -807,37 +1056,57 @@ def _generate_report(chat_history, file):
         "",
     ])
 
-    report_md = "\n".join(lines)
+    report_bytes = "\n".join(lines).encode("utf-8")
 
-    # Write to a temp file that Gradio can serve
-    tmp = tempfile.NamedTemporaryFile(
-        mode="w",
-        suffix=".md",
-        prefix=f"compliance_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}_",
-        delete=False,
-        encoding="utf-8",
+    # Write into the shared report directory that Gradio serves from
+    stamp = time.strftime("%Y%m%d_%H%M%S", t)
+    path = os.path.join(
+        _REPORT_DIR, f"compliance_report_{stamp}_{next(_report_counter)}.md"
     )
-    tmp.write(report_md)
-    tmp.close()
+    with open(path, "wb") as fh:
+        fh.write(report_bytes)
 
-    return gr.update(value=tmp.name, visible=True)
+    _report_paths.append(path)
+    while len(_report_paths) > _MAX_REPORTS:
+        try:
+            os.remove(_report_paths.popleft())
+        except OSError:
+            pass
+
+    return gr.update(value=path, visible=True)
 
 
 # APP LAUNCHER
 def launch_gradio_app():
     """Build and launch the Prometheus HUD Gradio interface."""
 
-    sys_info = _get_system_info()
-    initial_metrics = _build_metrics_html(sys_info)
+    # load models now so the first query runs at steady-state latency.
+    # warm_up() still imports torch on this thread for the HuggingFace
+    # embedder; the probe only keeps detection itself off the critical path
+    _start_hardware_probe()
+    warm_up()
+
     initial_chat = []  # Chat starts empty - welcome banner is separate
 
-    # closures that capture sys_info
+    # closures re-read system info so the hardware probe result shows up
+
+    def current_standby_metrics():
+        """Idle telemetry panel reflecting the hardware probe's current state."""
+        return _standby_metrics(tuple(sorted(_get_system_info().items())))
+
+    initial_metrics = current_standby_metrics()
 
-    def bot_response(chat_history, file):
-        """Generator: run the RAG pipeline and stream the answer word-by-word."""
+    async def bot_response(chat_history, file):
+        """Async generator: run the RAG pipeline and stream the answer token-by-token.
+
+        Each blocking step of the pipeline generator is advanced in a worker
+        thread, so one long query never holds up the event loop or other chats.
+        """
         if not chat_history:
             return
 
+        sys_info = _get_system_info()
+
         # Last entry is the user message added by _user_message()
         raw_content = chat_history[-1]["content"]
         user_msg = raw_content if isinstance(raw_content, str) else str(raw_content)
@@ -854,11 +1123,32 @@ def launch_gradio_app():
         chat_history = chat_history + [
             {"role": "assistant", "content": "Analyzing document..."}
         ]
-        yield chat_history, _build_metrics_html(sys_info, status="PROCESSING")
+        processing_html = _build_metrics_html(sys_info, status="PROCESSING")
+        yield chat_history, processing_html
 
-        # run instrumented pipeline
+        # run instrumented pipeline, streaming tokens as the LLM emits them
         try:
-            answer, sources, metrics = retriever_qa_with_metadata(file, user_msg)
+            last_yield = time.monotonic()
+            pending = 0
+            stream = retriever_qa_stream(file, user_msg)
+            while True:
+                item = await asyncio.to_thread(next, stream, None)
+                if item is None:
+                    break
+                answer, sources, metrics = item
+                if sources is not None:
+                    continue
+                pending += 1
+                now = time.monotonic()
+                if len(answer) > _STREAM_LARGE_CHARS:
+                    due = now - last_yield >= _STREAM_LARGE_INTERVAL
+                else:
+                    due = now - last_yield >= _STREAM_INTERVAL or pending >= _STREAM_MAX_PENDING
+                if due:
+                    chat_history[-1] = {"role": "assistant", "content": answer}
+                    yield chat_history, processing_html
+                    last_yield = now
+                    pending = 0
         except Exception as exc:
             logger.exception("Unhandled error in bot_response")
             chat_history[-1] = {"role": "assistant", "content": f"**System error:** {exc}"}
@@ -875,67 +1165,28 @@ def launch_gradio_app():
             yield chat_history, _build_metrics_html(sys_info, metrics or None, "ERROR")
             return
 
-        # typewriter streaming
+        # final answer + source attribution
         final_metrics_html = _build_metrics_html(sys_info, metrics, "COMPLETE")
-        words = answer.split()
-        streamed = ""
-
-        for i, word in enumerate(words):
-            streamed += word + " "
-            if i % _STREAM_CHUNK == 0 or i == len(words) - 1:
-                chat_history[-1] = {"role": "assistant", "content": streamed.strip()}
-                yield chat_history, final_metrics_html
-                time.sleep(_STREAM_DELAY)
+        content = answer.strip()
 
-        # append source attribution
         if sources:
-            src_md = "\n\n---\n**Sources Referenced:**\n"
-            for s in sources:
-                page_display = int(s["page"]) + 1 if str(s["page"]).isdigit() else s["page"]
-                excerpt = s["excerpt"][:160]
-                src_md += f"\n> **Page {page_display}** — *{excerpt} ...*\n"
-            chat_history[-1] = {"role": "assistant", "content": streamed.strip() + src_md}
-            yield chat_history, final_metrics_html
+            content += _format_sources(sources)
 
-    def clear_chat():
-        """Reset chat, metrics, and report file to initial state."""
-        return initial_chat, initial_metrics, gr.update(value=None, visible=False)
+        chat_history[-1] = {"role": "assistant", "content": content}
+        yield chat_history, final_metrics_html
 
-    # theme
-
-    theme = gr.themes.Base(
-        primary_hue=gr.themes.colors.cyan,
-        secondary_hue=gr.themes.colors.slate,
-        neutral_hue=gr.themes.colors.slate,
-        font=[
-            gr.themes.GoogleFont("Inter"),
-            "system-ui",
-            "sans-serif",
-        ],
-        font_mono=[
-            gr.themes.GoogleFont("JetBrains Mono"),
-            "Consolas",
-            "monospace",
-        ],
-    ).set(
-        body_background_fill="#040810",
-        body_background_fill_dark="#040810",
-        block_background_fill="transparent",
-        block_background_fill_dark="transparent",
-        block_border_color="transparent",
-        block_border_color_dark="transparent",
-        input_background_fill="#0a1018",
-        input_background_fill_dark="#0a1018",
-        body_text_color="#c8d6e5",
-        body_text_color_dark="#c8d6e5",
-        body_text_color_subdued="#6b8299",
-        body_text_color_subdued_dark="#6b8299",
-    )
+    def clear_chat(pdf_file):
+        """Reset chat, metrics, report file, and the current document's cached answers."""
+        # the answer cache is shared across sessions; only drop this document's
+        if pdf_file is not None:
+            clear_qa_cache(pdf_file)
+        standby_html = current_standby_metrics()
+        return initial_chat, standby_html, gr.update(value=None, visible=False)
 
     # layout
     with gr.Blocks(
         title="ComplianceDoc AI",
-        theme=theme,
+        theme=_get_theme(),
         css=_get_css(),
         js="() => { document.body.classList.add('dark', 'hd-dark'); }",
     ) as app:
@@ -1038,7 +1289,7 @@ def launch_gradio_app():
 
         clear_btn.click(
             fn=clear_chat,
-            inputs=None,
+            inputs=[pdf_input],
             outputs=[chatbot, metrics_panel, report_file],
         )
 
@@ -1054,6 +1305,10 @@ def launch_gradio_app():
             outputs=[chatbot],
         )
 
+        # the panel value above is fixed at build time; refresh it on every
+        # page load so new sessions pick up a probe that finished since
+        app.load(fn=current_standby_metrics, outputs=[metrics_panel])
+
         # theme toggle wiring — pure JS, no server round-trip
         # NOTE: We keep Gradio's 'dark' class ALWAYS on body so Gradio
         # doesn't inject its own built-in light theme. We only toggle
@@ -1078,6 +1333,10 @@ def launch_gradio_app():
             }""",
         )
 
+    app.queue(
+        default_concurrency_limit=_QUEUE_CONCURRENCY,
+        max_size=_QUEUE_MAX_SIZE,
+    )
     return app.launch(
         server_name="127.0.0.1",
         server_port=7860,
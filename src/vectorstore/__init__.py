@@ -1,3 +1,6 @@
 __all__ = [
-    "vector_database"
+    "vector_database",
+    "evict_vector_database",
+    "vector_retriever",
+    "SemanticCacheRetriever"
 ]
\ No newline at end of file
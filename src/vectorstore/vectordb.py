@@ -1,44 +1,232 @@
-from langchain_community.vectorstores import Chroma
-import hashlib
+from langchain_core.retrievers import BaseRetriever
+from pydantic import Field, PrivateAttr
+from config.loader import load_config
+from pathlib import Path
+from typing import Any
+import numpy as np
+import threading
 import logging
-import sys
+import tempfile
+import shutil
+import time
 import os
 
-sys.path.append(
-    os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-)
-
-from embedding.embed_model import get_embedding_model
+from src.embedding.cached_embeddings import content_hasher
+from src.embedding.embed_model import get_embedding_model
 
 logger = logging.getLogger(__name__)
 
-_vectordb_cache: dict[str, Chroma] = {}
+# Above this many chunks, use an approximate HNSW graph instead of a flat scan
+_HNSW_MIN_CHUNKS = 5000
+_HNSW_NEIGHBORS = 32
+
+_vectordb_cache: dict = {}
+
+# Built indexes persist here by default (one sub-directory per model and
+# content hash), so a restart does not re-embed documents seen before;
+# override with vectorstore.persist_dir or disable with vectorstore.persist
+VECTORDB_CACHE_DIR = Path(__file__).resolve().parents[2] / ".cache" / "faiss"
+_PERSIST_MAX_INDEXES = 32
+_STALE_TMP_SECONDS = 3600  # temp dirs this old were left by a crashed write
+
+# Semantic query cache — near-duplicate questions reuse earlier retrievals.
+# Off unless vectorstore.query_cache is set: questions that differ only in
+# a key entity can land within tau and would get each other's context
+_QUERY_CACHE_SIZE = 128
+_QUERY_CACHE_TAU = 0.05  # max cosine distance for a hit
 
 
 def _compute_chunks_hash(chunks) -> str:
     """
-    Compute a SHA-256 hash over document chunks so we can tell whether
-    the vector store needs to be rebuilt.
+    Compute a BLAKE3 (or BLAKE2b) hash over document chunks so we can tell
+    whether the vector store needs to be rebuilt.
+
+    The full text and page of every chunk are hashed: the key also names
+    a saved index whose docstore holds both, so an edit anywhere in a
+    chunk must produce a new key.
     """
-    hasher = hashlib.sha256()
-    for chunk in chunks:
-        hasher.update(chunk.page_content[:200].encode("utf-8", errors="replace"))
+    # whitespace-insensitive, so re-exports of the same PDF that only differ
+    # in spacing share an index; case is kept, it can change meaning (US/us).
+    # NUL keeps chunk boundaries
+    data = "\x00".join(" ".join(text.split()) for text in chunks.texts)
+    hasher = content_hasher(data.encode("utf-8", errors="replace"))
+    hasher.update(np.ascontiguousarray(chunks.pages, dtype=np.int32).tobytes())
     return hasher.hexdigest()
 
 
+def _private_dir(path):
+    """
+    Create `path` as an owner-only directory if it does not exist.
+
+    Returns False, so persistence is skipped, when the directory cannot
+    be created or is owned by another user — otherwise a local user
+    could plant a pickle under a predictable content hash, e.g. in a
+    shared tmpfs like /dev/shm. Group/other write access on a directory
+    we own is revoked.
+    """
+    try:
+        path.mkdir(mode=0o700, parents=True, exist_ok=True)
+        st = path.stat()
+        if not hasattr(os, "getuid"):
+            return True  # no POSIX ownership to check (Windows)
+        if st.st_uid != os.getuid():
+            logger.warning(
+                "Not persisting vector stores in %s: it is owned by another user.",
+                path,
+            )
+            return False
+        if st.st_mode & 0o022:
+            os.chmod(path, 0o700)
+    except OSError as exc:
+        logger.warning("Vector store directory %s is unavailable: %s", path, exc)
+        return False
+    return True
+
+
+def _persist_dir():
+    """
+    Return the index directory for the configured embedding model.
+
+    Returns None when `vectorstore.persist` is false, keeping indexes
+    in memory for the session only. `vectorstore.persist_dir` moves them
+    elsewhere, e.g. a tmpfs such as /dev/shm.
+    """
+    config = load_config()
+    store_cfg = config.get("vectorstore", {})
+    if not store_cfg.get("persist", True):
+        return None
+
+    embed_cfg = config.get("embedding_model", {})
+    model = str(embed_cfg.get("model", "default")).replace("/", "__")
+    if embed_cfg.get("quantize"):
+        model = f"{model}__{embed_cfg['quantize']}"
+
+    root = store_cfg.get("persist_dir")
+    base = Path(root).expanduser() if root else VECTORDB_CACHE_DIR
+    path = base / model
+
+    # saved indexes are unpickled on load, so only trust a directory we own
+    if not (_private_dir(base) and _private_dir(path)):
+        return None
+    return path
+
+
+def _load_persisted(chunks_hash, embed_model):
+    """Load a previously saved index for these chunks, or return None."""
+    root = _persist_dir()
+    if root is None:
+        return None
+
+    path = root / chunks_hash
+    if not (path / "index.faiss").exists():
+        return None
+
+    from langchain_community.vectorstores import FAISS
+
+    try:
+        # the pickled docstore was written by this application, not uploaded
+        vectordb = FAISS.load_local(
+            str(path), embed_model, allow_dangerous_deserialization=True
+        )
+    except Exception as exc:
+        logger.warning("Discarding unreadable index at %s: %s", path, exc)
+        shutil.rmtree(path, ignore_errors=True)
+        return None
+
+    # mtime marks recency for _prune_persisted()
+    try:
+        os.utime(path)
+    except OSError:
+        pass  # pruned by a concurrent query; the loaded store is still valid
+    return vectordb
+
+
+def _persist(chunks_hash, vectordb):
+    """Save an index under its content hash and prune the oldest ones."""
+    root = _persist_dir()
+    if root is None:
+        return
+
+    path = root / chunks_hash
+    tmp_path = None
+
+    # persistence is a best-effort cache: any failure (faiss raises
+    # RuntimeError on I/O errors) is logged and the in-memory store is kept
+    try:
+        # write to a unique temp dir first, so a crash never leaves a half
+        # index and concurrent first queries on one PDF never share a dir
+        tmp_path = tempfile.mkdtemp(dir=root, prefix=f".{chunks_hash}.", suffix=".tmp")
+        vectordb.save_local(tmp_path)
+        if (path / "index.faiss").exists():
+            # a concurrent query saved the same index first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        else:
+            os.replace(tmp_path, path)
+    except Exception as exc:
+        logger.warning("Could not persist vector store to %s: %s", path, exc)
+        if tmp_path is not None:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        return
+
+    _prune_persisted(root)
+
+
+def _prune_persisted(root):
+    """
+    Delete least-recently-used saved indexes beyond _PERSIST_MAX_INDEXES,
+    plus temp directories left behind by crashed writes.
+
+    Concurrent queries may prune the same directory at once, so entries
+    that vanish mid-scan are skipped rather than failing the query.
+    """
+    saved = []
+    now = time.time()
+    try:
+        entries = list(root.iterdir())
+    except OSError as exc:
+        logger.warning("Could not list saved vector stores in %s: %s", root, exc)
+        return
+
+    for path in entries:
+        try:
+            if not path.is_dir():
+                continue
+            mtime = path.stat().st_mtime
+            if path.name.startswith("."):
+                if path.name.endswith(".tmp") and now - mtime > _STALE_TMP_SECONDS:
+                    shutil.rmtree(path)
+                continue
+        except OSError:
+            continue
+        saved.append((mtime, path))
+
+    saved.sort()
+    for _, path in saved[:-_PERSIST_MAX_INDEXES]:
+        try:
+            shutil.rmtree(path)
+        except OSError:
+            continue
+        logger.info("Pruned saved vector store %s.", path.name[:12])
+
+
 def vector_database(chunks):
     """
-    Create or return a cached in-memory ChromaDB vector store.
+    Create or return a cached FAISS vector store.
 
     Each unique document (identified by a content hash) gets its own
-    isolated store. No data is persisted to disk, so uploading a new
-    PDF never retrieves stale results from a previous document.
+    isolated index, so uploading a new PDF never retrieves stale results
+    from a previous document. Built indexes are also saved under
+    .cache/faiss/ and reloaded after a restart instead of re-embedding.
+
+    Small documents use an exact flat index; large ones switch to an
+    HNSW graph, which keeps search sub-linear in the number of chunks.
+    Embeddings are L2-normalized, so L2 distance ranks like cosine.
 
     Args:
-        chunks: List of LangChain Document objects to index.
+        chunks: ChunkSet of texts, pages and sources to index.
 
     Returns:
-        Chroma: A ready-to-query ChromaDB vector store.
+        FAISS: A ready-to-query FAISS vector store.
 
     Raises:
         ValueError: If the chunks list is empty.
@@ -53,20 +241,181 @@ def vector_database(chunks):
         logger.info("Reusing cached vector store (hash=%s...).", chunks_hash[:12])
         return _vectordb_cache[chunks_hash]
 
+    embed_model = get_embedding_model()
+
+    vectordb = _load_persisted(chunks_hash, embed_model)
+    if vectordb is not None:
+        logger.info("Loaded saved vector store (hash=%s...).", chunks_hash[:12])
+        _vectordb_cache[chunks_hash] = vectordb
+        return vectordb
+
     logger.info(
         "Building new vector store for %d chunks (hash=%s...) ...",
         len(chunks),
         chunks_hash[:12],
     )
 
-    embed_model = get_embedding_model()
+    # faiss and the LangChain wrappers are imported on first build only
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+    import faiss
 
-    # Pure in-memory — no persist_directory
-    vectordb = Chroma.from_documents(
-        documents=chunks,
-        embedding=embed_model,
-    )
+    # One embedding call over the flat text list, then bulk-add the vectors
+    embeddings = embed_model.embed_documents(chunks.texts)
+    text_embeddings = zip(chunks.texts, embeddings)
 
+    if len(chunks) < _HNSW_MIN_CHUNKS:
+        vectordb = FAISS.from_embeddings(
+            text_embeddings, embedding=embed_model, metadatas=chunks.metadatas()
+        )
+    else:
+        vectordb = FAISS(
+            embedding_function=embed_model,
+            index=faiss.IndexHNSWFlat(len(embeddings[0]), _HNSW_NEIGHBORS),
+            docstore=InMemoryDocstore(),
+            index_to_docstore_id={},
+        )
+        vectordb.add_embeddings(text_embeddings, metadatas=chunks.metadatas())
+
+    _persist(chunks_hash, vectordb)
     _vectordb_cache[chunks_hash] = vectordb
     logger.info("Vector store cached successfully.")
     return vectordb
+
+
+def evict_vector_database(vectordb):
+    """
+    Drop a vector store from the cache so its memory can be reclaimed.
+
+    Called by the retriever layer when a document falls out of its LRU
+    cache. Unknown stores are ignored.
+
+    Args:
+        vectordb: A vector store previously returned by vector_database().
+    """
+    for chunks_hash, cached in list(_vectordb_cache.items()):
+        if cached is vectordb:
+            del _vectordb_cache[chunks_hash]
+            logger.info("Evicted vector store (hash=%s...).", chunks_hash[:12])
+
+
+def vector_retriever(vectordb, k=4):
+    """
+    Wrap a vector store in the configured retriever.
+
+    Returns a plain similarity retriever, or a SemanticCacheRetriever
+    when `vectorstore.query_cache` is true in the config;
+    `vectorstore.query_cache_tau` overrides its hit distance.
+
+    Args:
+        vectordb: A store returned by vector_database().
+        k: Number of chunks to retrieve per query.
+
+    Returns:
+        BaseRetriever: A retriever exposing `vectorstore` and `search_kwargs`.
+    """
+    store_cfg = load_config().get("vectorstore", {})
+    if store_cfg.get("query_cache", False):
+        return SemanticCacheRetriever(
+            vectorstore=vectordb,
+            search_kwargs={"k": k},
+            tau=store_cfg.get("query_cache_tau", _QUERY_CACHE_TAU),
+        )
+    return vectordb.as_retriever(search_kwargs={"k": k})
+
+
+class SemanticCacheRetriever(BaseRetriever):
+    """
+    Vector-store retriever with an approximate per-document query cache.
+
+    Each query is embedded once. If a previous query on the same store
+    lies within `tau` cosine distance, its retrieved chunks are returned
+    without searching the index; otherwise the store is searched with
+    the same embedding and the result is remembered. The least recently
+    used query is replaced once `capacity` are held.
+
+    Cached query vectors are rows of one preallocated matrix, so a
+    lookup is a single matrix-vector product rather than a Python loop.
+    Rows are stored as int8 with a per-row scale (a quarter of float32
+    memory); cosine similarity survives this well within tau.
+
+    Attributes:
+        vectorstore: The FAISS store to search on a cache miss.
+        search_kwargs: Passed to similarity_search_by_vector (e.g. k).
+        tau: Maximum cosine distance that still counts as a hit.
+        capacity: Number of cached queries kept.
+    """
+
+    vectorstore: Any
+    search_kwargs: dict = Field(default_factory=lambda: {"k": 4})
+    tau: float = _QUERY_CACHE_TAU
+    capacity: int = _QUERY_CACHE_SIZE
+
+    # (capacity, dim) int8 unit vectors and their scales, allocated on first insert
+    _keys: Any = PrivateAttr(default=None)
+    _scales: Any = PrivateAttr(default=None)
+    _docs: list = PrivateAttr(default_factory=list)
+    _last_used: Any = PrivateAttr(default=None)
+    _tick: int = PrivateAttr(default=0)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @staticmethod
+    def _quantize(vector):
+        """Symmetric int8 quantization: returns (int8 vector, scale)."""
+        scale = float(np.abs(vector).max()) / 127.0 or 1.0
+        return np.round(vector / scale).astype(np.int8), scale
+
+    def _lookup(self, vector):
+        """Return cached docs for the closest query within tau, else None."""
+        count = len(self._docs)
+        if not count:
+            return None
+
+        # accumulate in int32: int8 products summed over the dimension overflow int16
+        q_vector, q_scale = self._quantize(vector)
+        dots = np.einsum("ij,j->i", self._keys[:count], q_vector, dtype=np.int32)
+        sims = dots * (self._scales[:count] * q_scale)
+        best = int(sims.argmax())
+        if sims[best] < 1.0 - self.tau:
+            return None
+
+        self._tick += 1
+        self._last_used[best] = self._tick
+        return self._docs[best]
+
+    def _insert(self, vector, docs):
+        """Remember a query's docs, overwriting the least recently used slot when full."""
+        if self._keys is None:
+            self._keys = np.empty((self.capacity, vector.shape[0]), dtype=np.int8)
+            self._scales = np.empty(self.capacity, dtype=np.float32)
+            self._last_used = np.zeros(self.capacity, dtype=np.int64)
+
+        count = len(self._docs)
+        if count < self.capacity:
+            slot = count
+            self._docs.append(docs)
+        else:
+            slot = int(self._last_used.argmin())
+            self._docs[slot] = docs
+
+        self._tick += 1
+        self._keys[slot], self._scales[slot] = self._quantize(vector)
+        self._last_used[slot] = self._tick
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        vector = np.asarray(get_embedding_model().embed_query(query), dtype=np.float32)
+        vector /= np.linalg.norm(vector) or 1.0
+
+        with self._lock:
+            docs = self._lookup(vector)
+        if docs is not None:
+            logger.info("Semantic query cache hit.")
+            return docs
+
+        docs = self.vectorstore.similarity_search_by_vector(
+            vector.tolist(), **self.search_kwargs
+        )
+
+        with self._lock:
+            self._insert(vector, docs)
+        return docs
@@ -1,4 +1,5 @@
 from langchain_ollama import OllamaLLM
+import httpx
 
 def get_llm():
     """Test model endpoint..."""
@@ -6,9 +7,15 @@ def get_llm():
         model="mistral:7b", 
         base_url="http://127.0.0.1:11434",
         temperature=0.5,
+        # pooled keep-alive connections, model kept loaded between calls
+        keep_alive="30m",
+        client_kwargs={
+            "limits": httpx.Limits(max_keepalive_connections=10),
+            "timeout": 120.0,
+        },
     )
     return llm
 
 llm = get_llm()
 response = llm.invoke("hi")
-print(response)
\ No newline at end of file
+print(response)